@@ -0,0 +1,298 @@
+import gc
+import json
+import logging
+import pathlib
+import platform
+import random
+import socket
+import sys
+import tempfile
+import time
+import traceback
+import tracemalloc
+import typing
+from datetime import datetime
+
+from economy_analyzer import find_arbitrage_loops
+from generate_trades import (
+    format_duration_long,
+    generate_scoreboard_commands,
+    generate_trade_commands,
+    read_toml,
+    setup_logging,
+    write_text_file_lines,
+)
+from generate_trades_readme import trades_to_markdown
+from trade_index import TradeIndex
+from trades import Trade
+
+logger = logging.getLogger(__name__)
+
+"""
+Generator scalability benchmark
+
+Builds synthetic catalogs shaped like trades.py and measures, for every stage:
+- Wall time (best of N runs)
+- Peak traced memory (separate tracemalloc run so it does not skew timings)
+- Output bytes
+Results are saved as JSON so runs can be compared.
+"""
+
+__version__ = "1.0.0"  # Major.Minor.Patch
+
+
+def make_synthetic_catalog(trade_count: int, section_count: int, seed: int = 0) -> dict:
+    """
+    Builds a catalog with the same structure as trades.trades.
+    Trades are spread evenly over the sections and item IDs are unique per trade,
+    so the output size scales like a real catalog rather than compressing on repeats.
+    """
+    rng = random.Random(seed)
+    section_count = max(1, min(section_count, trade_count))
+    trade_sections = {}
+
+    for section_index in range(section_count):
+        first = trade_count * section_index // section_count
+        last = trade_count * (section_index + 1) // section_count
+        trades = []
+        for trade_index in range(first, last):
+            if rng.random() < 0.5:
+                buy_item, sell_item = f"minecraft:synthetic_item_{trade_index}", "minecraft:emerald"
+            else:
+                buy_item, sell_item = "minecraft:emerald", f"minecraft:synthetic_item_{trade_index}"
+            trades.append(Trade(
+                buy_item=buy_item,
+                buy_quantity=rng.randint(1, 64),
+                sell_item=sell_item,
+                sell_quantity=rng.randint(1, 64),
+                price_multiplier=0.05,
+                max_uses=rng.choice([1, 2, 4, 8, 16, 64]),
+                weight=1
+            ))
+        trade_sections[f"Section {section_index + 1}"] = {
+            "maximum_quantity": rng.randint(1, 3),
+            "trades": trades
+        }
+
+    return trade_sections
+
+
+def make_paired_catalog(trade_count: int, section_count: int, seed: int = 0) -> dict:
+    """
+    Builds a catalog of planks -> log / log -> planks style pairs, so the exchange graph
+    is made of many two-item components like the real catalog, rather than one emerald hub.
+    Pairs are break-even, so the analyzer has to search every component without finding a loop.
+    """
+    trade_sections = make_synthetic_catalog(trade_count, section_count, seed)
+    pair = 0
+    for section in trade_sections.values():
+        trades = section["trades"]
+        for position, trade in enumerate(trades):
+            planks, log = f"minecraft:synthetic_planks_{pair // 2}", f"minecraft:synthetic_log_{pair // 2}"
+            if pair % 2 == 0:
+                trades[position] = trade._replace(buy_item=planks, buy_quantity=4, sell_item=log, sell_quantity=1)
+            else:
+                trades[position] = trade._replace(buy_item=log, buy_quantity=1, sell_item=planks, sell_quantity=4)
+            pair += 1
+    return trade_sections
+
+
+def output_size(output: typing.Union[str, typing.List[str]]) -> int:
+    """
+    Bytes the output takes once written with write_text_file_lines.
+    """
+    if isinstance(output, str):
+        return len(output.encode("utf-8"))
+    return sum(len(line.encode("utf-8")) + 1 for line in output)
+
+
+def measure(func: typing.Callable, args: tuple, repeat: int) -> dict:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        start_time = time.perf_counter_ns()
+        result = func(*args)
+        timings.append(time.perf_counter_ns() - start_time)
+
+    result = None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "wall_seconds": min(timings) / 1e9,
+        "peak_memory_bytes": peak_memory,
+        "result": result
+    }
+
+
+def benchmark_catalog(trade_sections: dict, repeat: int) -> typing.List[dict]:
+    results = []
+
+    stages = [
+        ("generate_scoreboard_commands", generate_scoreboard_commands),
+        ("generate_trade_commands", generate_trade_commands),
+        ("trades_to_markdown", trades_to_markdown),
+    ]
+    trade_commands = None
+    for stage, func in stages:
+        measured = measure(func, (trade_sections,), repeat)
+        result = measured.pop("result")
+        measured["output_bytes"] = output_size(result)
+        if stage == "generate_trade_commands":
+            trade_commands = result
+        results.append({"stage": stage, **measured})
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        output_path = pathlib.Path(temp_dir) / "add_scoreboard_based_trade.mcfunction"
+        measured = measure(write_text_file_lines, (output_path, trade_commands), repeat)
+        measured.pop("result")
+        measured["output_bytes"] = output_path.stat().st_size
+        results.append({"stage": "write_text_file_lines", **measured})
+
+    trade_count = sum(len(section["trades"]) for section in trade_sections.values())
+    paired_refs = TradeIndex(make_paired_catalog(trade_count, len(trade_sections))).refs
+    measured = measure(find_arbitrage_loops, (paired_refs,), repeat)
+    measured.pop("result")
+    measured["output_bytes"] = 0  # Report only, nothing is written
+    results.append({"stage": "find_arbitrage_loops", **measured})
+
+    return results
+
+
+def run_benchmarks(trade_counts: typing.List[int], section_counts: typing.List[int], repeat: int, seed: int) -> typing.List[dict]:
+    results = []
+
+    for trade_count in trade_counts:
+        for section_count in section_counts:
+            if section_count > trade_count:
+                continue
+            trade_sections = make_synthetic_catalog(trade_count, section_count, seed)
+            logger.info(f"Benchmarking {trade_count} trades across {section_count} sections")
+            for result in benchmark_catalog(trade_sections, repeat):
+                result = {"trades": trade_count, "sections": section_count, **result}
+                logger.info(
+                    f"  {result['stage']}: {format_duration_long(result['wall_seconds'])}, "
+                    f"peak {result['peak_memory_bytes']} B, output {result['output_bytes']} B"
+                )
+                results.append(result)
+            trade_sections = None
+            gc.collect()
+
+    return results
+
+
+def compare_results(previous: typing.List[dict], current: typing.List[dict]) -> None:
+    """
+    Logs the wall time and peak memory ratio of every case present in both runs.
+    """
+    previous_by_case = {(r["trades"], r["sections"], r["stage"]): r for r in previous}
+    for result in current:
+        before = previous_by_case.get((result["trades"], result["sections"], result["stage"]))
+        if before is None:
+            continue
+        time_ratio = result["wall_seconds"] / before["wall_seconds"] if before["wall_seconds"] else float("inf")
+        memory_ratio = result["peak_memory_bytes"] / before["peak_memory_bytes"] if before["peak_memory_bytes"] else float("inf")
+        logger.info(
+            f"{result['trades']} trades / {result['sections']} sections / {result['stage']}: "
+            f"time x{time_ratio:.2f}, memory x{memory_ratio:.2f}"
+        )
+
+
+def main() -> None:
+    benchmark_config = config.get("benchmark", {})
+    trade_counts = benchmark_config.get("trade_counts", [100, 1_000, 10_000, 100_000, 1_000_000])
+    section_counts = benchmark_config.get("section_counts", [10, 100, 1_000])
+    repeat = benchmark_config.get("repeat", 3)
+    seed = benchmark_config.get("seed", 0)
+    results_folder_name = benchmark_config.get("results_folder_name", "benchmarks")
+
+    results = run_benchmarks(trade_counts, section_counts, repeat, seed)
+
+    report = {
+        "version": __version__,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "host": socket.gethostname(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": seed,
+        "repeat": repeat,
+        "results": results
+    }
+    results_dir = pathlib.Path(results_folder_name)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    results_path = results_dir / f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{script_name}_{pc_name}.json"
+    with open(results_path, 'w') as f:
+        json.dump(report, f, indent=4)
+    logger.info(f"Saved results to {results_path}")
+
+    compare_to = benchmark_config.get("compare_to")
+    if compare_to:
+        with open(compare_to, 'r') as f:
+            compare_results(json.load(f)["results"], results)
+
+
+if __name__ == "__main__":
+    config_path = pathlib.Path("config.toml")
+    if not config_path.exists():
+        raise FileNotFoundError(f"Missing {config_path}")
+    global config
+    config = read_toml(config_path)
+
+    console_logging_level = getattr(logging, config.get("logging", {}).get("console_logging_level", "INFO").upper(), logging.DEBUG)
+    file_logging_level = getattr(logging, config.get("logging", {}).get("file_logging_level", "INFO").upper(), logging.DEBUG)
+    logs_file_path = config.get("logging", {}).get("logs_file_path", "logs")
+    use_logs_folder = config.get("logging", {}).get("use_logs_folder", True)
+    number_of_logs_to_keep = config.get("logging", {}).get("number_of_logs_to_keep", 10)
+    log_message_format = config.get("logging", {}).get(
+        "log_message_format",
+        "%(asctime)s.%(msecs)03d %(levelname)s [%(funcName)s]: %(message)s"
+    )
+
+    script_name = pathlib.Path(__file__).stem
+    pc_name = socket.gethostname()
+    if use_logs_folder:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        log_dir = pathlib.Path(f"{logs_file_path}/{script_name}")
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log_file_name = f"{timestamp}_{script_name}_{pc_name}.log"
+        log_file_path = log_dir / log_file_name
+    else:
+        log_file_path = pathlib.Path(f"{script_name}_{pc_name}.log")
+
+    setup_logging(
+        logger,
+        log_file_path,
+        console_logging_level=console_logging_level,
+        file_logging_level=file_logging_level,
+        number_of_logs_to_keep=number_of_logs_to_keep,
+        log_message_format=log_message_format
+    )
+
+    error = 0
+    try:
+        start_time = time.perf_counter_ns()
+        logger.info(f"Script: {script_name} | Version: {__version__} | Host: {pc_name}")
+
+        main()
+        end_time = time.perf_counter_ns()
+        duration = end_time - start_time
+        duration = format_duration_long(duration / 1e9)
+        logger.info(f"Execution completed in {duration}.")
+    except KeyboardInterrupt:
+        logger.warning("Operation interrupted by user.")
+        error = 130
+    except Exception as e:
+        logger.warning(f"A fatal error has occurred: {repr(e)}\n{traceback.format_exc()}")
+        error = 1
+    finally:
+        for handler in logger.handlers:
+            handler.close()
+        logger.handlers.clear()
+        sys.exit(error)
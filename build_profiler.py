@@ -0,0 +1,109 @@
+import contextlib
+import cProfile
+import json
+import logging
+import pathlib
+import time
+import tracemalloc
+import typing
+
+logger = logging.getLogger(__name__)
+
+"""
+Per-stage build profiling
+
+Shared by the build scripts' --profile/--cprofile options. Disabled profilers cost
+one attribute check per stage, so the stage() calls can stay in the build code.
+Stage wall times are taken with tracemalloc (and cProfile, if enabled) running, so they
+are inflated compared to an unprofiled build; the report labels them as traced.
+Use them to compare stages, and benchmark_generator.py for untraced timings.
+"""
+
+
+class BuildProfiler:
+    def __init__(self, enabled: bool = False, cprofile_enabled: bool = False) -> None:
+        self.enabled = enabled or cprofile_enabled
+        self.cprofile_enabled = cprofile_enabled
+        self.stages = []
+        self._cprofile = cProfile.Profile() if cprofile_enabled else None
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> typing.Iterator[None]:
+        """
+        Records wall time, net allocated bytes and peak traced bytes of the wrapped block.
+        Repeated stage names are summed in the report.
+        tracemalloc only runs inside stages, so code between stages is not slowed down.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        memory_before, _ = tracemalloc.get_traced_memory()
+        start_time = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start_time
+            memory_after, memory_peak = tracemalloc.get_traced_memory()
+            if started_tracing:
+                tracemalloc.stop()
+            self.stages.append({
+                "stage": name,
+                "wall_seconds": duration / 1e9,
+                "allocated_bytes": memory_after - memory_before,
+                "peak_bytes": memory_peak - memory_before
+            })
+
+    def start(self) -> None:
+        if self._cprofile is not None:
+            self._cprofile.enable()
+
+    def stop(self) -> None:
+        if self._cprofile is not None:
+            self._cprofile.disable()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def summary(self) -> typing.List[dict]:
+        totals = {}
+        for record in self.stages:
+            total = totals.setdefault(record["stage"], {"stage": record["stage"], "calls": 0, "wall_seconds": 0.0, "allocated_bytes": 0, "peak_bytes": 0})
+            total["calls"] += 1
+            total["wall_seconds"] += record["wall_seconds"]
+            total["allocated_bytes"] += record["allocated_bytes"]
+            total["peak_bytes"] = max(total["peak_bytes"], record["peak_bytes"])
+        return list(totals.values())
+
+    def write_report(self, log_file_path: typing.Union[str, pathlib.Path], log: logging.Logger = logger) -> None:
+        """
+        Writes <log name>.profile.json, and <log name>.prof when cProfile is enabled,
+        next to the log file.
+        """
+        if not self.enabled:
+            return
+        log_file_path = pathlib.Path(log_file_path)
+
+        for total in self.summary():
+            log.info(
+                f"Stage {total['stage']}: {total['wall_seconds']:.6f}s traced over {total['calls']} call(s), "
+                f"allocated {total['allocated_bytes']} B, peak {total['peak_bytes']} B"
+            )
+
+        report_path = log_file_path.with_suffix(".profile.json")
+        with open(report_path, 'w') as f:
+            json.dump({
+                # Wall times include tracemalloc overhead, and cProfile's when it is enabled
+                "traced": {"tracemalloc": True, "cprofile": self.cprofile_enabled},
+                "stages": self.summary(),
+                "records": self.stages
+            }, f, indent=4)
+        log.info(f"Wrote profile report to {report_path}")
+
+        if self._cprofile is not None:
+            cprofile_path = log_file_path.with_suffix(".prof")
+            self._cprofile.dump_stats(cprofile_path)
+            log.info(f"Wrote cProfile stats to {cprofile_path}")
@@ -0,0 +1,284 @@
+import collections
+import logging
+import math
+import pathlib
+import socket
+import sys
+import time
+import traceback
+import typing
+from datetime import datetime
+
+from generate_trades import format_duration_long, load_module, read_toml, setup_logging
+from trade_index import TradeIndex, TradeRef, format_ref
+
+logger = logging.getLogger(__name__)
+
+"""
+Trade economy analyzer
+
+Treats every trade as a directed edge from the item it buys to the item it sells, with
+rate sell_quantity / buy_quantity. A cycle whose rates multiply to more than 1 is an
+arbitrage loop: players end up with more of an item than they started with.
+
+Loops are found with Bellman-Ford on -log(rate), run separately on each strongly
+connected component since no cycle can cross components.
+"""
+
+__version__ = "1.0.0"  # Major.Minor.Patch
+
+# Rates are compared in log space; gains below this are rounding noise, not loops
+EPSILON = 1e-9
+
+
+class ArbitrageLoop(typing.NamedTuple):
+    refs: typing.Tuple[TradeRef, ...]
+    gain: float  # Items of the starting item received per item spent going once around the loop
+
+
+def strongly_connected_components(graph: typing.Dict[str, typing.List[typing.Tuple[str, int]]]) -> typing.List[typing.List[str]]:
+    """
+    Iterative Tarjan, so deep catalogs do not hit the recursion limit.
+    `graph` maps each item to its (target item, edge id) pairs.
+    """
+    index_of = {}
+    lowlink = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+
+    for root in graph:
+        if root in index_of:
+            continue
+        work = [(root, iter(graph[root]))]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, edges = work[-1]
+            advanced = False
+            for target, _ in edges:
+                if target not in index_of:
+                    index_of[target] = lowlink[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(graph.get(target, ()))))
+                    advanced = True
+                    break
+                if target in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[target])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
+
+
+def predecessor_cycles(
+        predecessor: typing.Dict[str, typing.Tuple[str, int]],
+        edges: typing.List[typing.Tuple[str, str, float]]) -> typing.List[typing.List[int]]:
+    """
+    Returns the cycles of the predecessor graph as lists of edge ids, in trade order.
+    Every node has at most one predecessor, so this is a single O(V) walk.
+    """
+    state = {}  # node -> walk id it was first visited in
+    loops = []
+    for walk_id, start in enumerate(predecessor):
+        node = start
+        while node in predecessor and node not in state:
+            state[node] = walk_id
+            node = predecessor[node][0]
+        if node not in predecessor or state.get(node) != walk_id:
+            continue
+        loop_start = node
+        loop = []
+        while True:
+            node, edge_id = predecessor[node]
+            loop.append(edge_id)
+            if node == loop_start:
+                break
+        if sum(edges[edge_id][2] for edge_id in loop) < -EPSILON:
+            loops.append(list(reversed(loop)))
+    return loops
+
+
+def find_component_loops(
+        adjacency: typing.Dict[str, typing.List[typing.Tuple[str, int, float]]],
+        edges: typing.List[typing.Tuple[str, str, float]]) -> typing.List[typing.List[int]]:
+    """
+    Queue-based Bellman-Ford from a virtual source connected to every node, on the edges
+    inside one component. Every |V| relaxations the predecessor graph is checked for a
+    cycle, which can only be a profitable loop, so components full of loops stop almost
+    immediately instead of running all |V| passes.
+    `adjacency` maps every node of the component to its (target, edge id, weight) edges
+    that stay inside the component.
+    """
+    distance = dict.fromkeys(adjacency, 0.0)
+    predecessor = {}
+    queue = collections.deque(adjacency)
+    queued = set(adjacency)
+    relaxations = 0
+
+    while queue:
+        source = queue.popleft()
+        queued.discard(source)
+        for target, edge_id, weight in adjacency[source]:
+            if distance[source] + weight < distance[target] - EPSILON:
+                distance[target] = distance[source] + weight
+                predecessor[target] = (source, edge_id)
+                relaxations += 1
+                if relaxations % len(adjacency) == 0:
+                    loops = predecessor_cycles(predecessor, edges)
+                    if loops:
+                        return loops
+                if target not in queued:
+                    queued.add(target)
+                    queue.append(target)
+
+    return predecessor_cycles(predecessor, edges)
+
+
+def find_arbitrage_loops(refs: typing.List[TradeRef]) -> typing.List[ArbitrageLoop]:
+    """
+    Returns at least one profitable loop for every component of the exchange graph that has one.
+    Parallel trades between the same two items are reduced to the best rate first.
+    """
+    best = {}
+    for ref in refs:
+        trade = ref.trade
+        rate = trade.sell_quantity / trade.buy_quantity
+        key = (trade.buy_item, trade.sell_item)
+        if key not in best or rate > best[key][0]:
+            best[key] = (rate, ref)
+
+    edges = []
+    edge_refs = []
+    graph = {}
+    for (source, target), (rate, ref) in best.items():
+        graph.setdefault(source, []).append((target, len(edges)))
+        graph.setdefault(target, [])
+        edges.append((source, target, -math.log(rate)))
+        edge_refs.append(ref)
+
+    loops = []
+    for edge_id, (source, target, weight) in enumerate(edges):
+        if source == target and weight < -EPSILON:
+            loops.append([edge_id])
+
+    # Bucket edges by component in one pass; scanning every edge per component is quadratic
+    # on catalogs made of many small loops such as planks <-> log pairs
+    component_of = {}
+    adjacencies = []
+    for component in strongly_connected_components(graph):
+        if len(component) < 2:
+            continue
+        for node in component:
+            component_of[node] = len(adjacencies)
+        adjacencies.append({node: [] for node in component})
+    for edge_id, (source, target, weight) in enumerate(edges):
+        component_id = component_of.get(source)
+        if component_id is not None and component_of.get(target) == component_id:
+            adjacencies[component_id][source].append((target, edge_id, weight))
+
+    for adjacency in adjacencies:
+        loops.extend(find_component_loops(adjacency, edges))
+
+    return [
+        ArbitrageLoop(
+            refs=tuple(edge_refs[edge_id] for edge_id in loop),
+            gain=math.exp(-sum(edges[edge_id][2] for edge_id in loop))
+        )
+        for loop in loops
+    ]
+
+
+def main() -> int:
+    refs = TradeIndex(load_module("trades").trades).refs
+    analysis_start = time.perf_counter_ns()
+    loops = find_arbitrage_loops(refs)
+    logger.info(f"Analyzed {len(refs)} trades in {format_duration_long((time.perf_counter_ns() - analysis_start) / 1e9)}")
+
+    for loop in loops:
+        logger.warning(f"Arbitrage loop with gain x{loop.gain:.4f}:")
+        for ref in loop.refs:
+            logger.warning(f"  {format_ref(ref)}")
+    if not loops:
+        logger.info("No arbitrage loops found")
+    return len(loops)
+
+
+if __name__ == "__main__":
+    config_path = pathlib.Path("config.toml")
+    if not config_path.exists():
+        raise FileNotFoundError(f"Missing {config_path}")
+    global config
+    config = read_toml(config_path)
+
+    console_logging_level = getattr(logging, config.get("logging", {}).get("console_logging_level", "INFO").upper(), logging.DEBUG)
+    file_logging_level = getattr(logging, config.get("logging", {}).get("file_logging_level", "INFO").upper(), logging.DEBUG)
+    logs_file_path = config.get("logging", {}).get("logs_file_path", "logs")
+    use_logs_folder = config.get("logging", {}).get("use_logs_folder", True)
+    number_of_logs_to_keep = config.get("logging", {}).get("number_of_logs_to_keep", 10)
+    log_message_format = config.get("logging", {}).get(
+        "log_message_format",
+        "%(asctime)s.%(msecs)03d %(levelname)s [%(funcName)s]: %(message)s"
+    )
+
+    script_name = pathlib.Path(__file__).stem
+    pc_name = socket.gethostname()
+    if use_logs_folder:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        log_dir = pathlib.Path(f"{logs_file_path}/{script_name}")
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log_file_name = f"{timestamp}_{script_name}_{pc_name}.log"
+        log_file_path = log_dir / log_file_name
+    else:
+        log_file_path = pathlib.Path(f"{script_name}_{pc_name}.log")
+
+    setup_logging(
+        logger,
+        log_file_path,
+        console_logging_level=console_logging_level,
+        file_logging_level=file_logging_level,
+        number_of_logs_to_keep=number_of_logs_to_keep,
+        log_message_format=log_message_format
+    )
+
+    error = 0
+    try:
+        start_time = time.perf_counter_ns()
+        logger.info(f"Script: {script_name} | Version: {__version__} | Host: {pc_name}")
+
+        if main():
+            # Non-zero exit so pre-commit hooks and CI fail on new loops
+            error = 2
+        end_time = time.perf_counter_ns()
+        duration = end_time - start_time
+        duration = format_duration_long(duration / 1e9)
+        logger.info(f"Execution completed in {duration}.")
+    except KeyboardInterrupt:
+        logger.warning("Operation interrupted by user.")
+        error = 130
+    except Exception as e:
+        logger.warning(f"A fatal error has occurred: {repr(e)}\n{traceback.format_exc()}")
+        error = 1
+    finally:
+        for handler in logger.handlers:
+            handler.close()
+        logger.handlers.clear()
+        sys.exit(error)
@@ -1,6 +1,11 @@
+import argparse
+import copy
+import fnmatch
+import io
 import json
 import logging
 import pathlib
+import re
 import socket
 import sys
 import time
@@ -9,7 +14,26 @@ import traceback
 import typing
 from datetime import datetime
 
+from build_profiler import BuildProfiler
+from generate_trades_readme import trades_to_markdown
+from mcfunction_debug_message_generator import generate_mcfunction_debug_line
+
 logger = logging.getLogger(__name__)
+profiler = BuildProfiler()
+
+# Serialized trade forms each generator mode reads, as Trade method names
+SERIALIZED_FORMS = {
+    "scoreboard": ("add_nbt", "unless_nbt"),
+    "compact": ("add_snbt",),
+    "macro": ("unless_snbt", "add_snbt"),
+}
+
+# Compact mode marks each picked guard in this objective; short because it appears twice on every chain line
+GUARD_OBJECTIVE = "RWTGuard"
+
+# Smallest lazy_radius accepted: creative entity reach is 5 blocks from the eyes to the hitbox,
+# which is about 7 blocks feet to feet, plus a block of movement before the next tick
+MIN_LAZY_RADIUS = 8
 
 __version__ = "1.0.0"  # Major.Minor.Patch
 
@@ -50,81 +74,638 @@ def write_text_file_lines(file_path: typing.Union[str, pathlib.Path], lines: typ
         logger.error(f"Error writing {file_path}: {e}")
 
 
-def generate_scoreboard_commands(trade_sections: dict) -> list[str]:
+def pool_selection(section: dict, selection: typing.Union[int, dict, None]) -> tuple[int, list[int]]:
+    """
+    Returns (picks, positions in the section a pick may land on) for one section of a pool.
+    `selection` is a quota for the whole section, or {"quota": n, "buys": glob, "sells": glob}
+    to roll only the trades whose items match; None rolls the section's maximum_quantity.
+    """
+    trades = section["trades"]
+    if selection is None:
+        return section["maximum_quantity"], list(range(len(trades)))
+    if isinstance(selection, int):
+        return selection, list(range(len(trades)))
+    positions = [
+        position for position, trade in enumerate(trades)
+        if fnmatch.fnmatchcase(trade.buy_item, selection.get("buys", "*"))
+        and fnmatch.fnmatchcase(trade.sell_item, selection.get("sells", "*"))
+    ]
+    return selection["quota"], positions
+
+
+def generate_score_roll_commands(first_index: int, positions: list[int]) -> list[str]:
+    """
+    Rolls first_index + one of `positions` into @s's score.
+    Consecutive positions are a single `random value` range. Otherwise the roll picks a slot and
+    every run of consecutive positions is shifted onto its indices, highest run first: a shifted
+    score is never below its own slot, so it cannot land in a run that is still to be processed.
+    """
+    if positions[-1] - positions[0] + 1 == len(positions):
+        return [
+            f"execute store result score @s RandomsWanderingTraders run random value "
+            f"{first_index + positions[0]}..{first_index + positions[-1]}"
+        ]
+
+    runs = []
+    for slot, position in enumerate(positions):
+        if runs and position == runs[-1][2] + 1:
+            runs[-1][1:] = [slot, position]
+        else:
+            runs.append([slot, slot, position])
+    commands = [f"execute store result score @s RandomsWanderingTraders run random value 0..{len(positions) - 1}"]
+    for first_slot, last_slot, last_position in reversed(runs):
+        shift = first_index + last_position - last_slot
+        if shift:
+            commands.append(
+                f"execute if score @s RandomsWanderingTraders matches {first_slot}..{last_slot} "
+                f"run scoreboard players add @s RandomsWanderingTraders {shift}"
+            )
+    return commands
+
+
+def generate_scoreboard_commands(trade_sections: dict, compact: bool = False, quotas: typing.Optional[dict] = None) -> list[str]:
+    """
+    `quotas` maps section name to what to roll from it for a trader pool (see pool_selection).
+    Sections missing from it are not rolled; by default every section rolls its maximum_quantity.
+    """
     commands = []
+    # `execute as @s run` is a no-op wrapper; compact output calls the function directly
+    call = "function" if compact else "execute as @s run function"
     index = 1
 
-    for section in trade_sections.values():
-        trades = section["trades"]
-        max_qty = section["maximum_quantity"]
-
-        count = len(trades)
-        start = index
-        end = index + count - 1
+    for name, section in trade_sections.items():
+        max_qty, positions = pool_selection(section, None if quotas is None else quotas.get(name, 0))
 
         for _ in range(max_qty):
+            commands.extend(generate_score_roll_commands(index, positions))
             commands.append(
-                f"execute store result score @s RandomsWanderingTraders run random value {start}..{end}"
-            )
-            commands.append(
-                "execute as @s run function randoms_wandering_traders:add_scoreboard_based_trade"
+                f"{call} randoms_wandering_traders:add_scoreboard_based_trade"
             )
 
-        index = end + 1
+        index += len(section["trades"])
 
     return commands
 
 
-def generate_trade_commands(trade_sections: dict) -> list[str]:
+def serialize_catalog(trade_sections: dict, forms: typing.Iterable[str]) -> dict[str, list[str]]:
+    """
+    Serializes every trade once per form, in catalog order, keyed by Trade method name.
+    One build passes the result to every generator, so the base output, overlays and size
+    reports share the strings instead of serializing the catalog again.
+    """
+    trades = [trade for section in trade_sections.values() for trade in section["trades"]]
+    return {form: [getattr(trade, form)() for trade in trades] for form in forms}
+
+
+def generate_trade_commands(trade_sections: dict, serialized: typing.Optional[dict] = None) -> list[str]:
+    if serialized is None:
+        serialized = serialize_catalog(trade_sections, SERIALIZED_FORMS["scoreboard"])
     commands = []
-    index = 1
+
+    for index, (guard, recipe) in enumerate(zip(serialized["unless_nbt"], serialized["add_nbt"]), start=1):
+        commands.append(
+            f"execute if score @s RandomsWanderingTraders matches {index} "
+            f"unless data entity @s Offers.Recipes.[{guard}] "
+            f"run data modify entity @s Offers.Recipes insert -1 value {recipe}"
+        )
+
+    return commands
+
+
+def generate_storage_commands(trade_sections: dict, serialized: typing.Optional[dict] = None) -> list[str]:
+    """
+    Writes the whole catalog into one storage list, indexed from 0 in section order.
+    Each entry keeps the duplicate guard next to the full recipe so a macro can use both.
+    """
+    if serialized is None:
+        serialized = serialize_catalog(trade_sections, SERIALIZED_FORMS["macro"])
+    entries = [
+        f"{{guard:{guard},recipe:{recipe}}}"
+        for guard, recipe in zip(serialized["unless_snbt"], serialized["add_snbt"])
+    ]
+
+    return [
+        f"data modify storage randoms_wandering_traders:trades list set value [{','.join(entries)}]"
+    ]
+
+
+def guard_ids(trade_sections: dict) -> list[int]:
+    """
+    Returns each trade's guard id, in catalog order: the 1-based index of the first trade with
+    the same buy and sell, which is exactly what the Offers.Recipes guard treats as a repeat.
+    """
+    first_index = {}
+    ids = []
 
     for section in trade_sections.values():
         for trade in section["trades"]:
+            key = (trade.buy_item, trade.buy_quantity, trade.sell_item, trade.sell_quantity)
+            ids.append(first_index.setdefault(key, len(ids) + 1))
+
+    return ids
+
+
+def generate_compact_trade_commands(trade_sections: dict, serialized: typing.Optional[dict] = None) -> list[str]:
+    """
+    Same per-index chain as generate_trade_commands in compact SNBT, with the guard compound
+    replaced by a score: guard identity is known at generation time, so each line checks and
+    sets #<guard id> in GUARD_OBJECTIVE, which modify_this_wandering_trader resets per trader.
+    The recipe stays inline; a shared storage list would hold the same bytes in load.mcfunction
+    and add a storage path to every line.
+    """
+    if serialized is None:
+        serialized = serialize_catalog(trade_sections, SERIALIZED_FORMS["compact"])
+    commands = []
+
+    for index, (guard_id, recipe) in enumerate(zip(guard_ids(trade_sections), serialized["add_snbt"]), start=1):
+        guard = f"#{guard_id} {GUARD_OBJECTIVE}"
+        commands.append(
+            f"execute if score @s RandomsWanderingTraders matches {index} "
+            f"unless score {guard} matches 1 store success score {guard} "
+            f"run data modify entity @s Offers.Recipes append value {recipe}"
+        )
+
+    return commands
+
+
+def generate_guard_reset_commands() -> list[str]:
+    """
+    Clears the compact mode guard marks before a trader's rolls, so only its own picks count as repeats.
+    """
+    return [f"scoreboard players reset * {GUARD_OBJECTIVE}"]
+
+
+def generate_macro_scoreboard_commands(trade_sections: dict, quotas: typing.Optional[dict] = None) -> list[str]:
+    commands = []
+    index = 0
+
+    for name, section in trade_sections.items():
+        max_qty, positions = pool_selection(section, None if quotas is None else quotas.get(name, 0))
+        consecutive = positions and positions[-1] - positions[0] + 1 == len(positions)
+
+        for _ in range(max_qty):
+            if consecutive:
+                commands.append(
+                    f"execute store result storage randoms_wandering_traders:args index int 1 "
+                    f"run random value {index + positions[0]}..{index + positions[-1]}"
+                )
+            else:
+                commands.extend(generate_score_roll_commands(index, positions))
+                commands.append(
+                    "execute store result storage randoms_wandering_traders:args index int 1 run scoreboard players get @s RandomsWanderingTraders"
+                )
             commands.append(
-                f"execute if score @s RandomsWanderingTraders matches {index} "
-                f"unless data entity @s Offers.Recipes.[{trade.unless_nbt()}] "
-                f"run data modify entity @s Offers.Recipes insert -1 value {trade.add_nbt()}"
+                "function randoms_wandering_traders:pick_indexed_trade with storage randoms_wandering_traders:args"
             )
-            index += 1
+
+        index += len(section["trades"])
 
     return commands
 
 
-def export_scoreboard_commands(trade_sections: dict, output_path: typing.Union[str, pathlib.Path]):
-    lines = generate_scoreboard_commands(trade_sections)
-    write_text_file_lines(output_path, lines)
+def generate_macro_trade_commands() -> dict[str, list[str]]:
+    """
+    Returns the two macro functions that replace the per-index score chain.
+    Their size does not depend on the catalog, so neither takes the trade sections.
+    """
+    return {
+        "pick_indexed_trade": [
+            "$function randoms_wandering_traders:add_indexed_trade with storage randoms_wandering_traders:trades list[$(index)]"
+        ],
+        "add_indexed_trade": [
+            "$execute unless data entity @s Offers.Recipes[$(guard)] run data modify entity @s Offers.Recipes append value $(recipe)"
+        ],
+    }
+
+
+def generate_roll_commands(trade_sections: dict, mode: str, quotas: typing.Optional[dict] = None) -> list[str]:
+    if mode == "scoreboard":
+        return generate_scoreboard_commands(trade_sections, quotas=quotas)
+    if mode == "compact":
+        return generate_scoreboard_commands(trade_sections, compact=True, quotas=quotas)
+    if mode == "macro":
+        return generate_macro_scoreboard_commands(trade_sections, quotas=quotas)
+    raise ValueError(f"Unknown generator mode: {mode}")
+
+
+def resolve_pools(trade_sections: dict, pools: dict, profile: typing.Optional[list] = None) -> dict:
+    """
+    Validates the trader pools from trades.py and keeps only those named in `profile`, if given.
+    Each pool is {"sections": {section name: selection}, "tag": ..., "dimension": ...}, with
+    selections as in pool_selection; a pool with both tag and dimension needs both to match, and
+    a pool without either is the fallback for traders no other pool matches.
+    """
+    if profile:
+        missing = [name for name in profile if name not in pools]
+        if missing:
+            raise KeyError(f"Unknown trader pools in profile: {missing}")
+        pools = {name: pools[name] for name in profile}
+
+    fallbacks = [name for name, pool in pools.items() if "tag" not in pool and "dimension" not in pool]
+    if len(fallbacks) > 1:
+        raise ValueError(f"Only one trader pool may omit tag and dimension, got {fallbacks}")
+    if pools and not fallbacks:
+        logger.warning("No fallback trader pool; traders matching no pool will have no offers")
+
+    for name, pool in pools.items():
+        if not re.fullmatch(r"[a-z0-9_.-]+", name):
+            raise ValueError(f"Trader pool name must be a valid function name: {name!r}")
+        unknown = [section for section in pool["sections"] if section not in trade_sections]
+        if unknown:
+            raise KeyError(f"Trader pool {name!r} references unknown sections: {unknown}")
+        for section_name, selection in pool["sections"].items():
+            if isinstance(selection, dict):
+                unknown_keys = selection.keys() - {"quota", "buys", "sells"}
+                if unknown_keys or not isinstance(selection.get("quota"), int):
+                    raise ValueError(f"Trader pool {name!r} section {section_name!r} needs an int quota and only buys/sells filters, got {selection!r}")
+            elif not isinstance(selection, int):
+                raise ValueError(f"Trader pool {name!r} section {section_name!r} must be a quota or a dict, got {selection!r}")
+            quota, positions = pool_selection(trade_sections[section_name], selection)
+            if quota > 0 and not positions:
+                raise ValueError(f"Trader pool {name!r} section {section_name!r} matches no trades")
+
+    # Fallback last so it only catches traders the selective pools did not return on
+    return dict(sorted(pools.items(), key=lambda item: item[0] in fallbacks))
+
+
+def generate_pool_commands(trade_sections: dict, mode: str, pools: dict) -> tuple[list[str], dict[str, list[str]]]:
+    """
+    Returns the dispatch lines for modify_this_wandering_trader and one quota function per pool.
+    Pools only hold roll lines into the shared trade table, so their size does not grow with the catalog;
+    a pool rolling part of a section adds one line per run of consecutive trades it keeps.
+    """
+    dispatch = []
+    files = {}
+
+    for name, pool in pools.items():
+        function = f"randoms_wandering_traders:pool/{name}"
+        conditions = []
+        if "tag" in pool:
+            conditions.append(f"if entity @s[tag={pool['tag']}]")
+        if "dimension" in pool:
+            conditions.append(f"at @s if dimension {pool['dimension']}")
+        if conditions:
+            dispatch.append(f"execute {' '.join(conditions)} run return run function {function}")
+        else:
+            dispatch.append(f"function {function}")
+        files[f"pool/{name}"] = generate_roll_commands(trade_sections, mode, quotas=pool["sections"])
+
+    return dispatch, files
+
+
+def generate_tick_commands(traders_per_tick: int = 0, lazy_radius: int = 0) -> list[str]:
+    """
+    With a budget, at most `traders_per_tick` new traders are initialized each tick.
+    Untagged traders are the queue: the rest stay untagged and are picked up on later ticks.
+
+    With `lazy_radius`, offers are only built once a player comes within that many blocks,
+    which has to be at least MIN_LAZY_RADIUS. Traders near players are tagged pending first and
+    then initialized in one pass, so a trader near several players is only rolled once. Pending
+    traders are about to be in reach, so they are never queued: the budget does not apply.
+    Rolls do not depend on when they happen, so nothing but the tag is written on detection.
+    """
+    commands = []
+    selector = "@e[type=minecraft:wandering_trader,tag=!RandomsWanderingTrader"
+    if lazy_radius > 0:
+        commands.append(
+            f"execute as @a[gamemode=!spectator] at @s run tag {selector},distance=..{lazy_radius}] add RandomsWanderingTraderPending"
+        )
+        selector += ",tag=RandomsWanderingTraderPending"
+    elif traders_per_tick > 0:
+        selector += f",limit={traders_per_tick}"
+    commands.append(f"execute as {selector}] run function randoms_wandering_traders:modify_this_wandering_trader")
+    return commands
 
 
-def export_trade_commands(trade_sections: dict, output_path: typing.Union[str, pathlib.Path]):
-    lines = generate_trade_commands(trade_sections)
-    write_text_file_lines(output_path, lines)
+def generate_function_files(
+        trade_sections: dict,
+        mode: str,
+        pools: typing.Optional[dict] = None,
+        traders_per_tick: int = 0,
+        lazy_radius: int = 0,
+        serialized: typing.Optional[dict] = None) -> dict[str, list[str]]:
+    """
+    Returns every generated function body for one generator mode, keyed by function name.
+    Used for overlays, which need complete functions rather than snippets to paste.
+    With trader pools, modify_this_wandering_trader dispatches to one quota function per pool.
+    """
+    load = ["scoreboard objectives add RandomsWanderingTraders dummy"]
+    tick = generate_tick_commands(traders_per_tick, lazy_radius)
+    modify = [
+        "tag @s add RandomsWanderingTrader",
+        "data modify entity @s Offers.Recipes set value []",
+        ""
+    ]
+    pool_files = {}
+    if pools:
+        rolls, pool_files = generate_pool_commands(trade_sections, mode, pools)
+    else:
+        rolls = generate_roll_commands(trade_sections, mode)
+
+    if mode == "scoreboard":
+        return {
+            "load": load,
+            "tick": tick,
+            "modify_this_wandering_trader": modify + rolls,
+            "add_scoreboard_based_trade": generate_trade_commands(trade_sections, serialized),
+            **pool_files,
+        }
+    if mode == "compact":
+        return {
+            "load": load + [f"scoreboard objectives add {GUARD_OBJECTIVE} dummy"],
+            "tick": tick,
+            "modify_this_wandering_trader": modify + generate_guard_reset_commands() + rolls,
+            "add_scoreboard_based_trade": generate_compact_trade_commands(trade_sections, serialized),
+            **pool_files,
+        }
+    if mode == "macro":
+        files = {
+            "load": load + generate_storage_commands(trade_sections, serialized),
+            "tick": tick,
+            "modify_this_wandering_trader": modify + rolls,
+            **pool_files,
+            # Shadow the base per-index chain with an empty function so it is never parsed
+            "add_scoreboard_based_trade": [],
+        }
+        files.update(generate_macro_trade_commands())
+        return files
+    raise ValueError(f"Unknown generator mode: {mode}")
+
+
+def function_file_sizes(files: dict[str, list[str]]) -> dict[str, int]:
+    """
+    Bytes each function takes once written with write_text_file_lines.
+    """
+    return {name: sum(len(line.encode("utf-8")) + 1 for line in lines) for name, lines in files.items()}
 
 
-def export_all(trade_sections, scoreboard_path, trades_path):
-    export_scoreboard_commands(trade_sections, scoreboard_path)
-    export_trade_commands(trade_sections, trades_path)
+def compare_function_sizes(
+        trade_sections: dict,
+        mode: str,
+        pools: typing.Optional[dict] = None,
+        traders_per_tick: int = 0,
+        lazy_radius: int = 0,
+        serialized: typing.Optional[dict] = None) -> dict[str, tuple[int, int]]:
+    """
+    Returns (scoreboard baseline bytes, `mode` bytes) for every generated function.
+    """
+    before = function_file_sizes(generate_function_files(trade_sections, "scoreboard", pools, traders_per_tick, serialized=serialized))
+    after = function_file_sizes(generate_function_files(trade_sections, mode, pools, traders_per_tick, lazy_radius, serialized))
+    if mode == "compact" and sum(after.values()) >= sum(before.values()):
+        logger.warning(f"Compact output is not smaller than scoreboard output ({sum(after.values())} B >= {sum(before.values())} B)")
+    return {name: (before.get(name, 0), after.get(name, 0)) for name in sorted(before.keys() | after.keys())}
 
 
-def main():
-    trade_sections = load_module("trades").trades
+def report_function_sizes(mode: str, sizes: dict[str, tuple[int, int]]) -> None:
+    for name, (before, after) in sizes.items():
+        logger.info(f"{name}: {before} B -> {after} B ({mode})")
+    logger.info(f"Total: {sum(before for before, _ in sizes.values())} B -> {sum(after for _, after in sizes.values())} B ({mode})")
 
-    scoreboard_cmds = generate_scoreboard_commands(trade_sections)
-    trade_cmds = generate_trade_commands(trade_sections)
 
-    logger.info("SCOREBOARD COMMANDS:")
-    for c in scoreboard_cmds:
-        logger.info(c)
+def pack_format(value: typing.Union[int, list]) -> tuple[int, int]:
+    """
+    Normalizes a pack format, given as 82 or [82, 0], to (major, minor) for comparison.
+    """
+    if isinstance(value, int):
+        return value, 0
+    return value[0], value[1] if len(value) > 1 else 0
 
-    logger.info("\nTRADE COMMANDS:")
-    for c in trade_cmds:
-        logger.info(c)
 
-    export_all(
-        trade_sections,
-        config.get("output", {}).get("scoreboard_commands_path", "scoreboard_commands.txt"),
-        config.get("output", {}).get("trade_commands_path", "trade_commands.txt")
-    )
+def apply_overlay_entries(pack_mcmeta: dict, overlays: list[dict]) -> dict:
+    """
+    Returns a copy of pack.mcmeta with overlay entries matching the configured overlays.
+    Removes the overlays key entirely when none are configured.
+    Overlays must fall within the pack's declared format range.
+    """
+    pack_min = pack_format(pack_mcmeta["pack"]["min_format"])
+    pack_max = pack_format(pack_mcmeta["pack"]["max_format"])
+    for overlay in overlays:
+        overlay_min = pack_format(overlay["min_format"])
+        overlay_max = pack_format(overlay["max_format"])
+        if not pack_min <= overlay_min <= overlay_max <= pack_max:
+            raise ValueError(
+                f"Overlay {overlay['directory']} covers formats {overlay['min_format']} to {overlay['max_format']}, "
+                f"outside the pack's {pack_mcmeta['pack']['min_format']} to {pack_mcmeta['pack']['max_format']}"
+            )
+        if overlay_min == pack_min and overlay_max == pack_max:
+            logger.warning(f"Overlay {overlay['directory']} covers every supported format, so the base data/ folder is never loaded")
+
+    pack_mcmeta = copy.deepcopy(pack_mcmeta)
+    entries = [
+        {
+            "directory": overlay["directory"],
+            "min_format": overlay["min_format"],
+            "max_format": overlay["max_format"]
+        }
+        for overlay in overlays
+    ]
+    if entries:
+        pack_mcmeta["overlays"] = {"entries": entries}
+    else:
+        pack_mcmeta.pop("overlays", None)
+    return pack_mcmeta
+
+
+def update_pack_mcmeta_overlays(pack_mcmeta_path: typing.Union[str, pathlib.Path], overlays: list[dict]) -> None:
+    """
+    Rewrites the overlay entries in pack.mcmeta to match the configured overlays.
+    """
+    pack_mcmeta_path = pathlib.Path(pack_mcmeta_path)
+    with open(pack_mcmeta_path, 'r') as f:
+        pack_mcmeta = json.load(f)
+
+    pack_mcmeta = apply_overlay_entries(pack_mcmeta, overlays)
+
+    with open(pack_mcmeta_path, 'w') as f:
+        json.dump(pack_mcmeta, f, indent=4)
+    logger.info(f"Updated {len(overlays)} overlay entries in {pack_mcmeta_path}")
+
+
+def generate_outputs(
+        trade_sections: dict,
+        mode: str,
+        output_config: dict,
+        pools: typing.Optional[dict] = None,
+        traders_per_tick: int = 0,
+        lazy_radius: int = 0,
+        serialized: typing.Optional[dict] = None) -> dict[pathlib.Path, list[str]]:
+    """
+    Returns the snippet files for the base generator mode, keyed by output path.
+    With trader pools, the scoreboard snippet holds the pool dispatch and each pool's
+    quota function is written under pool_function_dir.
+    The tick snippet replaces tick.mcfunction, so the per-tick cap and lazy radius apply without an overlay.
+    """
+    scoreboard_path = pathlib.Path(output_config.get("scoreboard_commands_path", "scoreboard_commands.txt"))
+    trade_path = pathlib.Path(output_config.get("trade_commands_path", "trade_commands.txt"))
+    storage_path = pathlib.Path(output_config.get("storage_commands_path", "storage_commands.txt"))
+    tick_path = pathlib.Path(output_config.get("tick_commands_path", "tick_commands.txt"))
+
+    outputs = {tick_path: generate_tick_commands(traders_per_tick, lazy_radius)}
+    if pools:
+        pool_dir = pathlib.Path(output_config.get("pool_function_dir", "pool_functions"))
+        dispatch, pool_files = generate_pool_commands(trade_sections, mode, pools)
+        outputs[scoreboard_path] = dispatch
+        for name, lines in pool_files.items():
+            outputs[pool_dir / f"{name}.mcfunction"] = lines
+
+    if mode == "macro":
+        function_dir = pathlib.Path(output_config.get("macro_function_dir", "macro_functions"))
+        outputs = {
+            storage_path: generate_storage_commands(trade_sections, serialized),
+            scoreboard_path: generate_roll_commands(trade_sections, mode),
+            **outputs,
+        }
+        for name, lines in generate_macro_trade_commands().items():
+            outputs[function_dir / f"{name}.mcfunction"] = lines
+        return outputs
+    if mode == "compact":
+        load_path = pathlib.Path(output_config.get("load_commands_path", "load_commands.txt"))
+        outputs = {
+            load_path: [f"scoreboard objectives add {GUARD_OBJECTIVE} dummy"],
+            scoreboard_path: generate_roll_commands(trade_sections, mode),
+            trade_path: generate_compact_trade_commands(trade_sections, serialized),
+            **outputs,
+        }
+        outputs[scoreboard_path] = generate_guard_reset_commands() + outputs[scoreboard_path]
+        return outputs
+    if mode == "scoreboard":
+        scoreboard_cmds = generate_roll_commands(trade_sections, mode)
+        trade_cmds = generate_trade_commands(trade_sections, serialized)
+        return {scoreboard_path: scoreboard_cmds, trade_path: trade_cmds, **outputs}
+    raise ValueError(f"Unknown generator mode: {mode}")
+
+
+def generate_overlay_outputs(
+        trade_sections: dict,
+        overlay: dict,
+        pools: typing.Optional[dict] = None,
+        traders_per_tick: int = 0,
+        lazy_radius: int = 0,
+        serialized: typing.Optional[dict] = None) -> dict[pathlib.Path, list[str]]:
+    function_dir = pathlib.Path(overlay["directory"]) / "data" / "randoms_wandering_traders" / "function"
+    files = generate_function_files(trade_sections, overlay["mode"], pools, traders_per_tick, lazy_radius, serialized)
+    return {function_dir / f"{name}.mcfunction": lines for name, lines in files.items()}
+
+
+def with_debug_header(path: pathlib.Path, lines: list[str]) -> list[str]:
+    """
+    In-memory equivalent of mcfunction_debug_message_generator.add_or_update_debug_message.
+    """
+    # Anchored at the filesystem root so a "data" folder above the working directory is never matched
+    tellraw_line = generate_mcfunction_debug_line(pathlib.Path("/", path))
+    return ["# Debug Message", tellraw_line, ""] + lines
+
+
+class BuildArtifacts(typing.NamedTuple):
+    files: dict[pathlib.Path, list[str]]  # Output path -> lines, as write_text_file_lines writes them
+    readme: str
+    function_sizes: dict[str, dict[str, tuple[int, int]]]  # Mode -> function -> (baseline bytes, bytes); empty unless size_report is set
+    pack_mcmeta: typing.Optional[dict]
+
+    def to_buffers(self) -> dict[str, io.BytesIO]:
+        return {
+            path.as_posix(): io.BytesIO("".join(line + "\n" for line in lines).encode("utf-8"))
+            for path, lines in self.files.items()
+        }
+
+
+def build(
+        trade_sections: dict,
+        options: typing.Optional[dict] = None,
+        pools: typing.Optional[dict] = None,
+        pack_mcmeta: typing.Optional[dict] = None) -> BuildArtifacts:
+    """
+    Generates everything main() writes, in memory, without touching disk or logging setup.
+
+    Args:
+    trade_sections (dict): Catalog shaped like trades.trades.
+    options (dict): Same shape as config.toml; only the generator, output and overlays tables are read.
+        Size reports regenerate every function tree plus the scoreboard baseline, so they are
+        only built when generator.size_report is set.
+    pools (dict): Trader pools shaped like trades.pools.
+    pack_mcmeta (dict): Parsed pack.mcmeta to receive the overlay entries, if wanted.
+
+    Returns:
+    BuildArtifacts: Generated files, README markdown, function size reports and pack.mcmeta.
+    """
+    options = options or {}
+    output_config = options.get("output", {})
+    generator_config = options.get("generator", {})
+    mode = generator_config.get("mode", "scoreboard")
+    overlays = options.get("overlays", [])
+    pools = resolve_pools(trade_sections, pools or {}, generator_config.get("pools"))
+    traders_per_tick = generator_config.get("traders_per_tick", 0)
+    lazy_radius = generator_config.get("lazy_radius", 0)
+    size_report = generator_config.get("size_report", False)
+    if 0 < lazy_radius < MIN_LAZY_RADIUS:
+        raise ValueError(f"lazy_radius must be at least {MIN_LAZY_RADIUS} blocks to exceed interaction reach, got {lazy_radius}")
+    if lazy_radius > 0 and traders_per_tick > 0:
+        logger.warning("traders_per_tick is ignored with lazy_radius: pending traders are near a player and initialized at once")
+    if pools:
+        logger.info(f"Trader pools: {', '.join(pools)}")
+
+    modes = {mode, *(overlay["mode"] for overlay in overlays)}
+    if size_report:
+        modes.add("scoreboard")
+    forms = {form for generated_mode in modes for form in SERIALIZED_FORMS.get(generated_mode, ())}
+
+    with profiler.stage("nbt_serialization"):
+        serialized = serialize_catalog(trade_sections, sorted(forms))
+
+    with profiler.stage("command_generation"):
+        files = generate_outputs(trade_sections, mode, output_config, pools, traders_per_tick, lazy_radius, serialized)
+        function_sizes = {}
+        if size_report:
+            function_sizes[mode] = compare_function_sizes(trade_sections, mode, pools, traders_per_tick, lazy_radius, serialized)
+        overlay_files = {}
+        for overlay in overlays:
+            overlay_files.update(generate_overlay_outputs(trade_sections, overlay, pools, traders_per_tick, lazy_radius, serialized))
+            if size_report:
+                function_sizes[overlay["directory"]] = compare_function_sizes(
+                    trade_sections, overlay["mode"], pools, traders_per_tick, lazy_radius, serialized
+                )
+        readme = trades_to_markdown(trade_sections)
+
+    with profiler.stage("debug_header_walk"):
+        for path, lines in overlay_files.items():
+            files[path] = lines if path.stem in ("load", "tick") else with_debug_header(path, lines)
+
+    if pack_mcmeta is not None:
+        pack_mcmeta = apply_overlay_entries(pack_mcmeta, overlays)
+
+    return BuildArtifacts(files=files, readme=readme, function_sizes=function_sizes, pack_mcmeta=pack_mcmeta)
+
+
+def main():
+    with profiler.stage("catalog_import"):
+        catalog = load_module("trades")
+    generator_config = config.get("generator", {})
+    output_config = config.get("output", {})
+    logger.info(f"Generator mode: {generator_config.get('mode', 'scoreboard')}")
+    if generator_config.get("lazy_radius", 0) > 0:
+        logger.info(f"Building offers once a player is within {generator_config['lazy_radius']} blocks")
+    elif generator_config.get("traders_per_tick", 0) > 0:
+        logger.info(f"Initializing at most {generator_config['traders_per_tick']} traders per tick")
+    for overlay in config.get("overlays", []):
+        logger.info(f"Overlay {overlay['directory']}: formats {overlay['min_format']} to {overlay['max_format']}, mode {overlay['mode']}")
+
+    artifacts = build(catalog.trades, config, getattr(catalog, "pools", {}))
+    for label, key, default in (
+            ("SCOREBOARD COMMANDS:", "scoreboard_commands_path", "scoreboard_commands.txt"),
+            ("\nTRADE COMMANDS:", "trade_commands_path", "trade_commands.txt")):
+        path = pathlib.Path(output_config.get(key, default))
+        if path in artifacts.files:
+            logger.debug(label)
+            for c in artifacts.files[path]:
+                logger.debug(c)
+    for label, sizes in artifacts.function_sizes.items():
+        report_function_sizes(label, sizes)
+
+    with profiler.stage("file_writes"):
+        for path, lines in artifacts.files.items():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_text_file_lines(path, lines)
+        update_pack_mcmeta_overlays(output_config.get("pack_mcmeta_path", "pack.mcmeta"), config.get("overlays", []))
 
 
 def format_duration_long(duration_seconds: float) -> str:
@@ -197,11 +778,19 @@ def setup_logging(
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", action="store_true", help="Record per-stage wall time and allocations to a JSON report next to the log")
+    parser.add_argument("--cprofile", action="store_true", help="Also dump cProfile stats next to the log (implies --profile)")
+    args = parser.parse_args()
+    profiler = BuildProfiler(enabled=args.profile, cprofile_enabled=args.cprofile)
+    profiler.start()
+
     config_path = pathlib.Path("config.toml")
     if not config_path.exists():
         raise FileNotFoundError(f"Missing {config_path}")
     global config
-    config = read_toml(config_path)
+    with profiler.stage("config_load"):
+        config = read_toml(config_path)
 
     console_logging_level = getattr(logging, config.get("logging", {}).get("console_logging_level", "INFO").upper(), logging.DEBUG)
     file_logging_level = getattr(logging, config.get("logging", {}).get("file_logging_level", "INFO").upper(), logging.DEBUG)
@@ -250,6 +839,8 @@ if __name__ == "__main__":
         logger.warning(f"A fatal error has occurred: {repr(e)}\n{traceback.format_exc()}")
         error = 1
     finally:
+        profiler.stop()
+        profiler.write_report(log_file_path, logger)
         for handler in logger.handlers:
             handler.close()
         logger.handlers.clear()
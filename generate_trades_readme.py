@@ -1,3 +1,4 @@
+import argparse
 import logging
 import pathlib
 import socket
@@ -8,7 +9,10 @@ import traceback
 import typing
 from datetime import datetime
 
+from build_profiler import BuildProfiler
+
 logger = logging.getLogger(__name__)
+profiler = BuildProfiler()
 
 """
 Python Script Template
@@ -67,9 +71,11 @@ def trades_to_markdown(trades: dict) -> str:
 
 
 def main() -> None:
-    trade_sections = load_module("trades").trades
+    with profiler.stage("catalog_import"):
+        trade_sections = load_module("trades").trades
     logger.debug(f'{trade_sections=}')
-    text = trades_to_markdown(trade_sections)
+    with profiler.stage("markdown_generation"):
+        text = trades_to_markdown(trade_sections)
     print(text)
 
 
@@ -174,12 +180,21 @@ def load_config(file_path: typing.Union[str, pathlib.Path]) -> dict:
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", action="store_true", help="Record per-stage wall time and allocations to a JSON report next to the log")
+    parser.add_argument("--cprofile", action="store_true", help="Also dump cProfile stats next to the log (implies --profile)")
+    args = parser.parse_args()
+    profiler = BuildProfiler(enabled=args.profile, cprofile_enabled=args.cprofile)
+    profiler.start()
+
     error = 0
+    log_file_path = None
     try:
         script_name = pathlib.Path(__file__).stem
         config_path = pathlib.Path(f'{script_name}_config.toml')
         # config_path = pathlib.Path("config.toml")
-        config = load_config(config_path)
+        with profiler.stage("config_load"):
+            config = load_config(config_path)
 
         logging_config = config.get("logging", {})
         console_logging_level = getattr(logging, logging_config.get("console_logging_level", "INFO").upper(), logging.DEBUG)
@@ -217,6 +232,9 @@ if __name__ == "__main__":
         logger.warning(f'A fatal error has occurred: {repr(e)}\n{traceback.format_exc()}')
         error = 1
     finally:
+        profiler.stop()
+        if log_file_path is not None:
+            profiler.write_report(log_file_path, logger)
         for handler in logger.handlers:
             handler.close()
         logger.handlers.clear()
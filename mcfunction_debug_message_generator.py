@@ -1,3 +1,4 @@
+import argparse
 import logging
 import os
 import pathlib
@@ -10,7 +11,10 @@ import traceback
 import typing
 from datetime import datetime
 
+from build_profiler import BuildProfiler
+
 logger = logging.getLogger(__name__)
+profiler = BuildProfiler()
 
 """
 Python Script Template
@@ -178,10 +182,11 @@ def add_or_update_debug_message(mcfunction_path: pathlib.Path) -> None:
 
 
 def main() -> None:
-    for mcfunction_path in iter_matching_files(".", [r".*\/(?!tick|load)\w+\.mcfunction$"]):
-        mcfunction_path = pathlib.Path(mcfunction_path).resolve()
-        logger.debug(f"Processing {mcfunction_path}")
-        add_or_update_debug_message(mcfunction_path)
+    with profiler.stage("debug_header_walk"):
+        for mcfunction_path in iter_matching_files(".", [r".*\/(?!tick|load)\w+\.mcfunction$"]):
+            mcfunction_path = pathlib.Path(mcfunction_path).resolve()
+            logger.debug(f"Processing {mcfunction_path}")
+            add_or_update_debug_message(mcfunction_path)
 
 
 def format_duration_long(duration_seconds: float) -> str:
@@ -254,11 +259,19 @@ def setup_logging(
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile", action="store_true", help="Record per-stage wall time and allocations to a JSON report next to the log")
+    parser.add_argument("--cprofile", action="store_true", help="Also dump cProfile stats next to the log (implies --profile)")
+    args = parser.parse_args()
+    profiler = BuildProfiler(enabled=args.profile, cprofile_enabled=args.cprofile)
+    profiler.start()
+
     config_path = pathlib.Path("config.toml")
     if not config_path.exists():
         raise FileNotFoundError(f"Missing {config_path}")
     global config
-    config = read_toml(config_path)
+    with profiler.stage("config_load"):
+        config = read_toml(config_path)
 
     console_logging_level = getattr(logging, config.get("logging", {}).get("console_logging_level", "INFO").upper(), logging.DEBUG)
     file_logging_level = getattr(logging, config.get("logging", {}).get("file_logging_level", "INFO").upper(), logging.DEBUG)
@@ -307,6 +320,8 @@ if __name__ == "__main__":
         logger.warning(f"A fatal error has occurred: {repr(e)}\n{traceback.format_exc()}")
         error = 1
     finally:
+        profiler.stop()
+        profiler.write_report(log_file_path, logger)
         for handler in logger.handlers:
             handler.close()
         logger.handlers.clear()
@@ -0,0 +1,271 @@
+import array
+import concurrent.futures
+import csv
+import logging
+import os
+import pathlib
+import random
+import socket
+import struct
+import sys
+import time
+import traceback
+import typing
+from datetime import datetime
+
+from generate_trades import format_duration_long, load_module, pool_selection, read_toml, resolve_pools, setup_logging
+
+logger = logging.getLogger(__name__)
+
+"""
+Seeded trader offer simulation
+
+Replays the generated rules for many traders:
+- Section quotas (or one trader pool's quotas)
+- Uniform `random value` picks over each section's index range
+- The duplicate guard, which drops a pick whose buy/sell pair is already offered
+Traders are split into fixed-size chunks, each seeded from (seed, chunk index), so results
+are identical for a given seed no matter how many worker processes ran them.
+"""
+
+__version__ = "1.0.0"  # Major.Minor.Patch
+
+HISTOGRAM_MAGIC = b"RWTH"
+HISTOGRAM_VERSION = 1
+HISTOGRAM_HEADER = struct.Struct("<4sHQQII")  # magic, version, seed, traders, trade count, offer count buckets
+
+
+class SimulationRules(typing.NamedTuple):
+    picks: typing.Tuple[typing.Sequence[int], ...]  # Trade indexes each roll picks from, 0-based
+    guards: typing.Tuple[int, ...]  # Guard id per trade; equal ids are duplicates to the guard
+
+
+class Histograms(typing.NamedTuple):
+    seed: int
+    traders: int
+    trade_counts: array.array  # Traders that ended up offering each trade
+    offer_counts: array.array  # Traders by number of offers
+
+
+def build_rules(trade_sections: dict, quotas: typing.Optional[dict] = None) -> SimulationRules:
+    picks = []
+    guard_ids = {}
+    guards = []
+    index = 0
+
+    for name, section in trade_sections.items():
+        trades = section["trades"]
+        max_qty, positions = pool_selection(section, None if quotas is None else quotas.get(name, 0))
+        if positions == list(range(len(trades))):
+            candidates = range(index, index + len(trades))
+        else:
+            candidates = tuple(index + position for position in positions)
+        for _ in range(max_qty):
+            picks.append(candidates)
+        for trade in trades:
+            key = (trade.buy_item, trade.buy_quantity, trade.sell_item, trade.sell_quantity)
+            guards.append(guard_ids.setdefault(key, len(guard_ids)))
+        index += len(trades)
+
+    return SimulationRules(picks=tuple(picks), guards=tuple(guards))
+
+
+def chunk_seed(seed: int, chunk_index: int) -> int:
+    """
+    Only valid for non-negative seeds: random.Random seeds from abs() of an int, so a
+    negative seed would replay the chunks of its positive counterpart.
+    """
+    return (seed << 32) | chunk_index
+
+
+def simulate_chunk(rules: SimulationRules, seed: int, chunk_index: int, traders: int) -> typing.Tuple[typing.List[int], typing.List[int]]:
+    rng = random.Random(chunk_seed(seed, chunk_index))
+    # choice() draws the same way randint() does over a range, so whole sections replay identically
+    choice = rng.choice
+    guards = rules.guards
+    picks = rules.picks
+    trade_counts = [0] * len(guards)
+    offer_counts = [0] * (len(picks) + 1)
+
+    for _ in range(traders):
+        offered = set()
+        for candidates in picks:
+            trade_index = choice(candidates)
+            guard = guards[trade_index]
+            if guard not in offered:
+                offered.add(guard)
+                trade_counts[trade_index] += 1
+        offer_counts[len(offered)] += 1
+
+    return trade_counts, offer_counts
+
+
+def run_simulation(rules: SimulationRules, seed: int, traders: int, chunk_size: int, workers: int) -> Histograms:
+    """
+    Runs every chunk and sums the per-chunk histograms. Chunk boundaries and seeds depend only
+    on `seed`, `traders` and `chunk_size`, and summing is order-independent, so `workers` only
+    changes how fast the result arrives.
+    """
+    chunks = [(chunk_index, min(chunk_size, traders - start)) for chunk_index, start in enumerate(range(0, traders, chunk_size))]
+    trade_counts = array.array("Q", [0] * len(rules.guards))
+    offer_counts = array.array("Q", [0] * (len(rules.picks) + 1))
+
+    def merge(result):
+        chunk_trade_counts, chunk_offer_counts = result
+        for index, count in enumerate(chunk_trade_counts):
+            trade_counts[index] += count
+        for index, count in enumerate(chunk_offer_counts):
+            offer_counts[index] += count
+
+    if workers <= 1:
+        for chunk_index, chunk_traders in chunks:
+            merge(simulate_chunk(rules, seed, chunk_index, chunk_traders))
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(simulate_chunk, rules, seed, chunk_index, chunk_traders) for chunk_index, chunk_traders in chunks]
+            for done, future in enumerate(concurrent.futures.as_completed(futures), start=1):
+                merge(future.result())
+                logger.debug(f"Finished chunk {done}/{len(chunks)}")
+
+    return Histograms(seed=seed, traders=traders, trade_counts=trade_counts, offer_counts=offer_counts)
+
+
+def write_histograms(file_path: typing.Union[str, pathlib.Path], histograms: Histograms) -> None:
+    """
+    Little-endian header followed by the two uint64 arrays.
+    """
+    trade_counts = array.array("Q", histograms.trade_counts)
+    offer_counts = array.array("Q", histograms.offer_counts)
+    if sys.byteorder == "big":
+        trade_counts.byteswap()
+        offer_counts.byteswap()
+    with open(file_path, 'wb') as f:
+        f.write(HISTOGRAM_HEADER.pack(HISTOGRAM_MAGIC, HISTOGRAM_VERSION, histograms.seed, histograms.traders, len(trade_counts), len(offer_counts)))
+        trade_counts.tofile(f)
+        offer_counts.tofile(f)
+    logger.info(f"Successfully wrote {file_path}")
+
+
+def read_histograms(file_path: typing.Union[str, pathlib.Path]) -> Histograms:
+    with open(file_path, 'rb') as f:
+        magic, version, seed, traders, trade_count, offer_buckets = HISTOGRAM_HEADER.unpack(f.read(HISTOGRAM_HEADER.size))
+        if magic != HISTOGRAM_MAGIC or version != HISTOGRAM_VERSION:
+            raise ValueError(f"Not a version {HISTOGRAM_VERSION} histogram file: {file_path}")
+        trade_counts = array.array("Q")
+        trade_counts.fromfile(f, trade_count)
+        offer_counts = array.array("Q")
+        offer_counts.fromfile(f, offer_buckets)
+    if sys.byteorder == "big":
+        trade_counts.byteswap()
+        offer_counts.byteswap()
+    return Histograms(seed=seed, traders=traders, trade_counts=trade_counts, offer_counts=offer_counts)
+
+
+def export_csv(trade_sections: dict, histograms: Histograms, trades_csv_path: typing.Union[str, pathlib.Path], offers_csv_path: typing.Union[str, pathlib.Path]) -> None:
+    traders = histograms.traders or 1
+    with open(trades_csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["index", "section", "buy_item", "buy_quantity", "sell_item", "sell_quantity", "offered", "offer_rate"])
+        index = 0
+        for section_name, section in trade_sections.items():
+            for trade in section["trades"]:
+                count = histograms.trade_counts[index]
+                writer.writerow([index + 1, section_name, trade.buy_item, trade.buy_quantity, trade.sell_item, trade.sell_quantity, count, f"{count / traders:.6f}"])
+                index += 1
+    logger.info(f"Successfully wrote {trades_csv_path}")
+
+    with open(offers_csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["offers", "traders", "share"])
+        for offers, count in enumerate(histograms.offer_counts):
+            writer.writerow([offers, count, f"{count / traders:.6f}"])
+    logger.info(f"Successfully wrote {offers_csv_path}")
+
+
+def main() -> None:
+    simulation_config = config.get("simulation", {})
+    traders = simulation_config.get("traders", 1_000_000)
+    seed = simulation_config.get("seed", 0)
+    if not isinstance(seed, int) or seed < 0:
+        # Checked before simulating: the histogram header stores the seed as uint64
+        raise ValueError(f"[simulation] seed must be a non-negative integer, got {seed!r}")
+    chunk_size = simulation_config.get("chunk_size", 100_000)
+    workers = simulation_config.get("workers", 0) or os.cpu_count() or 1
+    pool = simulation_config.get("pool", "")
+    results_folder_name = simulation_config.get("results_folder_name", "simulations")
+
+    catalog = load_module("trades")
+    trade_sections = catalog.trades
+    quotas = None
+    if pool:
+        quotas = resolve_pools(trade_sections, getattr(catalog, "pools", {}), [pool])[pool]["sections"]
+    rules = build_rules(trade_sections, quotas)
+    logger.info(f"Simulating {traders} traders ({len(rules.picks)} rolls each) with seed {seed} on {workers} worker(s)")
+
+    histograms = run_simulation(rules, seed, traders, chunk_size, workers)
+
+    results_dir = pathlib.Path(results_folder_name)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    base_name = f"{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}_{script_name}_seed{seed}"
+    write_histograms(results_dir / f"{base_name}.bin", histograms)
+    export_csv(trade_sections, histograms, results_dir / f"{base_name}_trades.csv", results_dir / f"{base_name}_offer_counts.csv")
+
+
+if __name__ == "__main__":
+    config_path = pathlib.Path("config.toml")
+    if not config_path.exists():
+        raise FileNotFoundError(f"Missing {config_path}")
+    global config
+    config = read_toml(config_path)
+
+    console_logging_level = getattr(logging, config.get("logging", {}).get("console_logging_level", "INFO").upper(), logging.DEBUG)
+    file_logging_level = getattr(logging, config.get("logging", {}).get("file_logging_level", "INFO").upper(), logging.DEBUG)
+    logs_file_path = config.get("logging", {}).get("logs_file_path", "logs")
+    use_logs_folder = config.get("logging", {}).get("use_logs_folder", True)
+    number_of_logs_to_keep = config.get("logging", {}).get("number_of_logs_to_keep", 10)
+    log_message_format = config.get("logging", {}).get(
+        "log_message_format",
+        "%(asctime)s.%(msecs)03d %(levelname)s [%(funcName)s]: %(message)s"
+    )
+
+    script_name = pathlib.Path(__file__).stem
+    pc_name = socket.gethostname()
+    if use_logs_folder:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        log_dir = pathlib.Path(f"{logs_file_path}/{script_name}")
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log_file_name = f"{timestamp}_{script_name}_{pc_name}.log"
+        log_file_path = log_dir / log_file_name
+    else:
+        log_file_path = pathlib.Path(f"{script_name}_{pc_name}.log")
+
+    setup_logging(
+        logger,
+        log_file_path,
+        console_logging_level=console_logging_level,
+        file_logging_level=file_logging_level,
+        number_of_logs_to_keep=number_of_logs_to_keep,
+        log_message_format=log_message_format
+    )
+
+    error = 0
+    try:
+        start_time = time.perf_counter_ns()
+        logger.info(f"Script: {script_name} | Version: {__version__} | Host: {pc_name}")
+
+        main()
+        end_time = time.perf_counter_ns()
+        duration = end_time - start_time
+        duration = format_duration_long(duration / 1e9)
+        logger.info(f"Execution completed in {duration}.")
+    except KeyboardInterrupt:
+        logger.warning("Operation interrupted by user.")
+        error = 130
+    except Exception as e:
+        logger.warning(f"A fatal error has occurred: {repr(e)}\n{traceback.format_exc()}")
+        error = 1
+    finally:
+        for handler in logger.handlers:
+            handler.close()
+        logger.handlers.clear()
+        sys.exit(error)
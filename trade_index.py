@@ -0,0 +1,191 @@
+import argparse
+import fnmatch
+import json
+import logging
+import pathlib
+import socket
+import sys
+import time
+import traceback
+import typing
+from datetime import datetime
+
+from generate_trades import format_duration_long, load_module, read_toml, setup_logging
+from trades import Trade
+
+logger = logging.getLogger(__name__)
+
+"""
+Trade catalog query tool
+
+Indexes the catalog by item so lookups do not scan every trade:
+- Which trades buy an item (the item the player hands over)
+- Which trades sell an item (the item the player receives)
+Item arguments accept glob patterns such as "minecraft:*_log".
+"""
+
+__version__ = "1.0.0"  # Major.Minor.Patch
+
+
+class TradeRef(typing.NamedTuple):
+    section: str
+    score_index: int  # Score matched by add_scoreboard_based_trade in scoreboard and compact modes (1-based)
+    trade: Trade
+
+    @property
+    def storage_index(self) -> int:
+        """
+        Position in the macro mode storage list, randoms_wandering_traders:trades list (0-based).
+        """
+        return self.score_index - 1
+
+    def to_dict(self) -> dict:
+        return {"section": self.section, "score_index": self.score_index, "storage_index": self.storage_index, **self.trade._asdict()}
+
+
+class TradeIndex:
+    def __init__(self, trade_sections: dict) -> None:
+        self.refs: typing.List[TradeRef] = []
+        self.buys: typing.Dict[str, typing.List[int]] = {}
+        self.sells: typing.Dict[str, typing.List[int]] = {}
+        self.sections: typing.Dict[str, typing.List[int]] = {}
+
+        for section_name, section in trade_sections.items():
+            positions = self.sections.setdefault(section_name, [])
+            for trade in section["trades"]:
+                position = len(self.refs)
+                self.refs.append(TradeRef(section_name, position + 1, trade))
+                positions.append(position)
+                self.buys.setdefault(trade.buy_item, []).append(position)
+                self.sells.setdefault(trade.sell_item, []).append(position)
+
+    @staticmethod
+    def _match(index: typing.Dict[str, typing.List[int]], pattern: str) -> typing.Set[int]:
+        """
+        Exact item IDs are one dict lookup; patterns only scan the distinct item IDs,
+        never the trades themselves.
+        """
+        if not any(char in pattern for char in "*?["):
+            return set(index.get(pattern, ()))
+        positions = set()
+        for item in fnmatch.filter(index.keys(), pattern):
+            positions.update(index[item])
+        return positions
+
+    def buying(self, pattern: str) -> typing.List[TradeRef]:
+        return [self.refs[position] for position in sorted(self._match(self.buys, pattern))]
+
+    def selling(self, pattern: str) -> typing.List[TradeRef]:
+        return [self.refs[position] for position in sorted(self._match(self.sells, pattern))]
+
+    def query(
+            self,
+            buys: typing.Optional[str] = None,
+            sells: typing.Optional[str] = None,
+            section: typing.Optional[str] = None) -> typing.List[TradeRef]:
+        """
+        Returns trades matching every given filter, in catalog order.
+        With no filters, returns the whole catalog.
+        """
+        candidates = None
+        for index, pattern in ((self.buys, buys), (self.sells, sells), (self.sections, section)):
+            if pattern is None:
+                continue
+            positions = self._match(index, pattern)
+            candidates = positions if candidates is None else candidates & positions
+        if candidates is None:
+            return list(self.refs)
+        return [self.refs[position] for position in sorted(candidates)]
+
+
+def format_ref(ref: TradeRef) -> str:
+    trade = ref.trade
+    return (
+        f"{ref.section} score {ref.score_index} / storage [{ref.storage_index}]: {trade.buy_quantity} {trade.buy_item} -> "
+        f"{trade.sell_quantity} {trade.sell_item} ({trade.max_uses} max uses)"
+    )
+
+
+def main() -> None:
+    index_start = time.perf_counter_ns()
+    index = TradeIndex(load_module("trades").trades)
+    logger.debug(f"Indexed {len(index.refs)} trades in {format_duration_long((time.perf_counter_ns() - index_start) / 1e9)}")
+
+    refs = index.query(buys=args.buys, sells=args.sells, section=args.section)
+    if args.json:
+        print(json.dumps([ref.to_dict() for ref in refs], indent=4))
+    else:
+        for ref in refs:
+            print(format_ref(ref))
+    logger.info(f"{len(refs)} matching trades")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up trades by the item they buy or sell")
+    parser.add_argument("--buys", help='Item ID or glob the trade buys, e.g. "minecraft:gravel"')
+    parser.add_argument("--sells", help='Item ID or glob the trade sells, e.g. "minecraft:*_log"')
+    parser.add_argument("--section", help="Section name or glob")
+    parser.add_argument("--json", action="store_true", help="Print matches as JSON")
+    args = parser.parse_args()
+
+    config_path = pathlib.Path("config.toml")
+    if not config_path.exists():
+        raise FileNotFoundError(f"Missing {config_path}")
+    global config
+    config = read_toml(config_path)
+
+    console_logging_level = getattr(logging, config.get("logging", {}).get("console_logging_level", "INFO").upper(), logging.DEBUG)
+    file_logging_level = getattr(logging, config.get("logging", {}).get("file_logging_level", "INFO").upper(), logging.DEBUG)
+    logs_file_path = config.get("logging", {}).get("logs_file_path", "logs")
+    use_logs_folder = config.get("logging", {}).get("use_logs_folder", True)
+    number_of_logs_to_keep = config.get("logging", {}).get("number_of_logs_to_keep", 10)
+    log_message_format = config.get("logging", {}).get(
+        "log_message_format",
+        "%(asctime)s.%(msecs)03d %(levelname)s [%(funcName)s]: %(message)s"
+    )
+
+    script_name = pathlib.Path(__file__).stem
+    pc_name = socket.gethostname()
+    if use_logs_folder:
+        timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        log_dir = pathlib.Path(f"{logs_file_path}/{script_name}")
+        log_dir.mkdir(parents=True, exist_ok=True)
+        log_file_name = f"{timestamp}_{script_name}_{pc_name}.log"
+        log_file_path = log_dir / log_file_name
+    else:
+        log_file_path = pathlib.Path(f"{script_name}_{pc_name}.log")
+
+    if args.json:
+        # Keep stdout parseable
+        console_logging_level = max(console_logging_level, logging.WARNING)
+
+    setup_logging(
+        logger,
+        log_file_path,
+        console_logging_level=console_logging_level,
+        file_logging_level=file_logging_level,
+        number_of_logs_to_keep=number_of_logs_to_keep,
+        log_message_format=log_message_format
+    )
+
+    error = 0
+    try:
+        start_time = time.perf_counter_ns()
+        logger.info(f"Script: {script_name} | Version: {__version__} | Host: {pc_name}")
+
+        main()
+        end_time = time.perf_counter_ns()
+        duration = end_time - start_time
+        duration = format_duration_long(duration / 1e9)
+        logger.info(f"Execution completed in {duration}.")
+    except KeyboardInterrupt:
+        logger.warning("Operation interrupted by user.")
+        error = 130
+    except Exception as e:
+        logger.warning(f"A fatal error has occurred: {repr(e)}\n{traceback.format_exc()}")
+        error = 1
+    finally:
+        for handler in logger.handlers:
+            handler.close()
+        logger.handlers.clear()
+        sys.exit(error)
@@ -1,6 +1,30 @@
 import json
+import re
 from typing import NamedTuple
 
+UNQUOTED_SNBT_KEY = re.compile(r"^[A-Za-z0-9_.+-]+$")
+
+
+def to_snbt(value) -> str:
+    """
+    Serialize to compact SNBT: unquoted keys where allowed and no whitespace.
+    Floats get the `f` suffix so they keep the type the game stores.
+    """
+    if isinstance(value, dict):
+        return "{" + ",".join(
+            f"{key if UNQUOTED_SNBT_KEY.match(key) else json.dumps(key)}:{to_snbt(item)}"
+            for key, item in value.items()
+        ) + "}"
+    if isinstance(value, list):
+        return "[" + ",".join(to_snbt(item) for item in value) + "]"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float):
+        return f"{value}f"
+    if isinstance(value, int):
+        return str(value)
+    return json.dumps(value)
+
 
 class Trade(NamedTuple):
     buy_item: str
@@ -11,37 +35,43 @@ class Trade(NamedTuple):
     max_uses: int
     weight: int
 
-    def add_nbt(self) -> str:
-        return json.dumps(
-            {
-                "buy": {
-                    "id": self.buy_item,
-                    "count": self.buy_quantity
-                },
-                "sell": {
-                    "id": self.sell_item,
-                    "count": self.sell_quantity
-                },
-                "priceMultiplier": self.price_multiplier,
-                "maxUses": self.max_uses
+    def recipe(self) -> dict:
+        return {
+            "buy": {
+                "id": self.buy_item,
+                "count": self.buy_quantity
             },
-            separators=(',', ':')
-        )
+            "sell": {
+                "id": self.sell_item,
+                "count": self.sell_quantity
+            },
+            "priceMultiplier": self.price_multiplier,
+            "maxUses": self.max_uses
+        }
 
-    def unless_nbt(self) -> str:
-        return json.dumps(
-            {
-                "buy": {
-                    "id": self.buy_item,
-                    "count": self.buy_quantity
-                },
-                "sell": {
-                    "id": self.sell_item,
-                    "count": self.sell_quantity
-                }
+    def guard(self) -> dict:
+        return {
+            "buy": {
+                "id": self.buy_item,
+                "count": self.buy_quantity
             },
-            separators=(',', ':')
-        )
+            "sell": {
+                "id": self.sell_item,
+                "count": self.sell_quantity
+            }
+        }
+
+    def add_nbt(self) -> str:
+        return json.dumps(self.recipe(), separators=(',', ':'))
+
+    def unless_nbt(self) -> str:
+        return json.dumps(self.guard(), separators=(',', ':'))
+
+    def add_snbt(self) -> str:
+        return to_snbt(self.recipe())
+
+    def unless_snbt(self) -> str:
+        return to_snbt(self.guard())
 
 
 trades = {
@@ -179,3 +209,16 @@ trades = {
         ]
     },
 }
+
+
+# Trader pools draw from the sections above, so every pool shares one trade table.
+# Each pool maps section names to how many picks it rolls from them, or to
+# {"quota": n, "buys": glob, "sells": glob} to roll only part of a section without copying
+# its trades. Pools are chosen by trader tag and/or dimension; the one pool with neither is
+# the fallback. Leave empty to roll every section's maximum_quantity for all traders.
+# Example:
+# pools = {
+#     "nether": {"dimension": "minecraft:the_nether", "sections": {"Buys": 1, "Trades": {"quota": 1, "sells": "minecraft:*_log"}, "Generic": 3}},
+#     "default": {"sections": {"Buys": 1, "Trades": 2, "Dyes": 1, "Saplings": 2, "Plants": 2, "Generic": 3}},
+# }
+pools = {}